@@ -33,6 +33,7 @@ from networking_oneview.ml2.drivers.oneview import exceptions
 MAPPING_TYPE_NONE = 0
 FLAT_NET_MAPPINGS_TYPE = 1
 UPLINKSET_MAPPINGS_TYPE = 2
+MAPPING_TYPE_UNMAPPED = 3
 
 NETWORK_TYPE_TAGGED = 'tagged'
 NETWORK_TYPE_UNTAGGED = 'untagged'
@@ -42,6 +43,9 @@ LOG = log.getLogger(__name__)
 
 oneview_exceptions = importutils.try_import('hpOneView.exceptions')
 
+_conf_option_dicts = {}
+_engines = {}
+
 
 def get_oneview_conf():
     """Get OneView Access Configuration."""
@@ -105,7 +109,7 @@ def oneview_reauth(f):
 def id_from_uri(uri):
     if not uri:
         return None
-    return uri.split("/")[-1]
+    return uri.rsplit("/", 1)[-1]
 
 
 def id_list_from_uri_list(uri_list):
@@ -157,15 +161,15 @@ def get_uplinkset_by_name_in_lig(oneview_client, lig_id, uplinkset_name):
     return uplinkset
 
 
-def get_logical_interconnect_group_by_id(lig_id):
+def get_logical_interconnect_group_by_id(oneview_client, lig_id):
     """Get a Logical Interconnect Group Object to a given LIG id.
 
+    :param oneview_client: a instance of the OneView Client;
     :param lig_id: the id of the Logical Interconnect Group;
     :returns: the Logical Interconnect Group object
     :raise OneViewResourceNotFoundException: If it was not possible
         to retrieve LIG;
     """
-    oneview_client = get_oneview_client()
     try:
         return oneview_client.logical_interconnect_groups.get(lig_id)
     except oneview_exceptions.HPOneViewException:
@@ -176,15 +180,15 @@ def get_logical_interconnect_group_by_id(lig_id):
         raise exceptions.OneViewResourceNotFoundException(err_msg)
 
 
-def get_ethernet_network_by_id(oneview_network_id):
+def get_ethernet_network_by_id(oneview_client, oneview_network_id):
     """Get a Ethernet Network Object to a given Network id.
 
+    :param oneview_client: a instance of the OneView Client;
     :param oneview_network_id: the id of the Ethernet Network;
     :returns: the Ethernet Network object;
     :raise OneViewResourceNotFoundException: If it was not possible
         to retrieve the Network;
     """
-    oneview_client = get_oneview_client()
     try:
         return oneview_client.ethernet_networks.get(oneview_network_id)
     except oneview_exceptions.HPOneViewException:
@@ -195,15 +199,16 @@ def get_ethernet_network_by_id(oneview_network_id):
         raise exceptions.OneViewResourceNotFoundException(err_msg)
 
 
-def get_uplink_port_group_uris_for_ethernet_network_by_id(oneview_network_id):
+def get_uplink_port_group_uris_for_ethernet_network_by_id(
+        oneview_client, oneview_network_id):
     """Get Uplink Port Group URIs for a Ethernet Network by id.
 
+    :param oneview_client: a instance of the OneView Client;
     :param oneview_network_id: the id of the Ethernet Network;
     :returns: a list of Uplink Port Group URIs;
     :raise OneViewResourceNotFoundException: If it was not possible
         to retrieve the list;
     """
-    oneview_client = get_oneview_client()
     try:
         return oneview_client.ethernet_networks.get_associated_uplink_groups(
             oneview_network_id)
@@ -244,16 +249,22 @@ def load_conf_option_to_dict(key_value_option):
         provider_flat_net_mapping: ["oneview_network_id"]
     }
 
+    The result is parsed once per option value and shared between
+    callers, so it must not be modified.
+
     :param key_value_option: A string with the mappings, in the format
         provider:lig_id:uplinkset_name for uplinkset_mappings, and
         provider:oneview_network_id for flat_net_mappings;
     :returns: the Logical Interconnect Group object
     """
-    key_value_dict = {}
-
     if not key_value_option:
+        return {}
+
+    key_value_dict = _conf_option_dicts.get(key_value_option)
+    if key_value_dict is not None:
         return key_value_dict
 
+    key_value_dict = {}
     key_value_list = key_value_option.split(',')
 
     for key_value in key_value_list:
@@ -261,6 +272,7 @@ def load_conf_option_to_dict(key_value_option):
         provider = values[0]
         key_value_dict.setdefault(provider, []).extend(values[1:])
 
+    _conf_option_dicts[key_value_option] = key_value_dict
     return key_value_dict
 
 
@@ -340,22 +352,15 @@ def is_local_link_information_valid(local_link_information_list):
     4 - The switch info has information about being bootable
     5 - The switch info's bootable value is boolean
     """
-    if len(local_link_information_list) != 1:
+    if not local_link_information_list or (
+            len(local_link_information_list) != 1):
         return False
 
-    local_link_information = local_link_information_list[0]
-    switch_info = local_link_information.get('switch_info')
-
-    if not switch_info:
-        return False
-
-    server_hardware_uuid = switch_info.get('server_hardware_id')
-    bootable = switch_info.get('bootable')
-
-    if not server_hardware_uuid:
+    switch_info = local_link_information_list[0].get('switch_info') or {}
+    if not switch_info.get('server_hardware_id'):
         return False
 
-    return isinstance(bootable, bool)
+    return isinstance(switch_info.get('bootable'), bool)
 
 
 def server_hardware_from_local_link_information_list(
@@ -450,34 +455,19 @@ def get_server_hardware_power_state(server_hardware):
     return server_hardware.get('powerState')
 
 
-def is_lig_id_uplink_name_mapped(lig_bd_entry, mappings):
-    mapped_lig_id = lig_bd_entry.get('oneview_lig_id')
-    mapped_uplink_name = lig_bd_entry.get('oneview_uplinkset_name')
-    for lig_id, uplinkset_name in zip(mappings[0::2], mappings[1::2]):
-        if lig_id == mapped_lig_id and (
-                uplinkset_name == mapped_uplink_name):
-            return True
-    return False
-
-
 def get_boot_priority(server_profile, bootable):
     if bootable:
         connections = server_profile.get('connections')
-        if _is_boot_priority_available(connections, 'Primary'):
-            return 'Primary'
-        elif _is_boot_priority_available(connections, 'Secondary'):
-            return 'Secondary'
+        taken_boot_priorities = set(
+            (connection.get('boot') or {}).get('priority')
+            for connection in connections)
+        for boot_priority in ('Primary', 'Secondary'):
+            if boot_priority not in taken_boot_priorities:
+                return boot_priority
         return None
     return 'NotBootable'
 
 
-def _is_boot_priority_available(connections, boot_priority):
-    for connection in connections:
-        if connection.get('boot').get('priority') == boot_priority:
-            return False
-    return True
-
-
 def port_id_from_mac(server_hardware, mac_address):
     port_info = _get_port_info(server_hardware, mac_address)
     if not port_info:
@@ -494,33 +484,24 @@ def port_id_from_mac(server_hardware, mac_address):
 def _get_port_info(server_hardware, mac_address):
     port_map = server_hardware.get('portMap')
     device_slots = port_map.get('deviceSlots')
-    try:
-        for device_slot in device_slots:
-            physical_ports = device_slot.get('physicalPorts')
-            for physical_port in physical_ports:
-                virtual_ports = physical_port.get('virtualPorts')
-                for virtual_port in virtual_ports:
-                    mac = virtual_port.get('mac')
-                    if mac.upper() == mac_address.upper():
-                        return {
-                            'virtual_port_function': virtual_port.get(
-                                'portFunction'
-                            ),
-                            'physical_port_number': physical_port.get(
-                                'portNumber'
-                            ),
-                            'device_slot_port_number': device_slot.get(
-                                'slotNumber'
-                            ),
-                            'device_slot_location': device_slot.get(
-                                'location'
-                            ),
-                        }
+    mac_address = mac_address.upper()
+
+    port = next((
+        (device_slot, physical_port, virtual_port)
+        for device_slot in device_slots
+        for physical_port in device_slot.get('physicalPorts')
+        for virtual_port in physical_port.get('virtualPorts')
+        if virtual_port.get('mac').upper() == mac_address), None)
+    if not port:
         return None
-    except oneview_exceptions.HPOneViewException as ex:
-        LOG.warning("Could not get port information on the Server "
-                    "Hardware: %s" % server_hardware.get('uuid'))
-        raise ex
+
+    device_slot, physical_port, virtual_port = port
+    return {
+        'virtual_port_function': virtual_port.get('portFunction'),
+        'physical_port_number': physical_port.get('portNumber'),
+        'device_slot_port_number': device_slot.get('slotNumber'),
+        'device_slot_location': device_slot.get('location'),
+    }
 
 
 def connection_with_mac_address(connections, mac_address):
@@ -531,31 +512,51 @@ def connection_with_mac_address(connections, mac_address):
 
 
 def is_port_valid_to_reflect_on_oneview(
-        session, port_dict, local_link_information):
-
+        session, port_dict, local_link_information,
+        neutron_oneview_network=None):
+    return valid_port_neutron_oneview_network(
+        session, port_dict, local_link_information,
+        neutron_oneview_network) is not None
+
+
+def valid_port_neutron_oneview_network(
+        session, port_dict, local_link_information,
+        neutron_oneview_network=None):
+    """Get the network mapping of a port valid to reflect on OneView.
+
+    The mapping is only retrieved from the database, when it is not given,
+    once the port is known to be a baremetal port.
+
+    :param session: The database session;
+    :param port_dict: The Neutron port dict;
+    :param local_link_information: The port's local link information;
+    :param neutron_oneview_network: The port's network mapping, if known;
+    :returns: The port's network mapping, or None if the port is not
+        valid to reflect on OneView;
+    """
     vnic_type = port_dict.get('binding:vnic_type')
     port_id = port_dict.get("id")
     if vnic_type != 'baremetal':
-        LOG.warning("'vnic_type' of the port %s must be baremetal" %
-                    port_id)
-        return False
+        LOG.warning("'vnic_type' of the port %s must be baremetal", port_id)
+        return None
 
-    network_id = port_dict.get('network_id')
-    neutron_oneview_network = database_manager.get_neutron_oneview_network(
-        session, network_id
-    )
+    if neutron_oneview_network is None:
+        network_id = port_dict.get('network_id')
+        neutron_oneview_network = (
+            database_manager.get_neutron_oneview_network(session, network_id))
     if not neutron_oneview_network:
-        LOG.warning(
-            "There is no network created for the port %s" % port_id)
-        return False
+        LOG.warning("There is no network created for the port %s", port_id)
+        return None
 
-    return _is_local_link_information_valid(port_id, local_link_information)
+    if not _is_local_link_information_valid(port_id, local_link_information):
+        return None
+    return neutron_oneview_network
 
 
 def _is_local_link_information_valid(port_id, local_link_information):
     if not local_link_information:
         LOG.warning(
-            "The port %s must have 'local_link_information'" % port_id)
+            "The port %s must have 'local_link_information'", port_id)
         return False
 
     if len(local_link_information) > 1:
@@ -571,21 +572,21 @@ def _is_local_link_information_valid(port_id, local_link_information):
             "'local_link_information' must contain 'switch_info'.")
         return False
 
-    server_hardware_id = switch_info.get('server_hardware_id')
+    if not switch_info.get('server_hardware_id'):
+        LOG.warning(
+            "'local_link_information' must contain `server_hardware_id`.")
+        return False
+
+    bootable = switch_info.get('bootable')
+    if isinstance(bootable, bool):
+        return True
 
     try:
-        strutils.bool_from_string(
-            subject=switch_info.get('bootable'),
-            strict=True)
+        strutils.bool_from_string(subject=bootable, strict=True)
     except ValueError:
         LOG.warning("'bootable' must be a boolean.")
         return False
 
-    if not server_hardware_id:
-        LOG.warning(
-            "'local_link_information' must contain `server_hardware_id`.")
-        return False
-
     return True
 
 
@@ -599,12 +600,13 @@ def remove_inconsistence_from_db(
     )
 
 
-def check_valid_resources():
+def check_valid_resources(oneview_client):
     """Verify if the OneView resources exist.
 
     Verify if the resources described on the configuration file
     exist on OneView.
 
+    :param oneview_client: a instance of the OneView Client;
     :raise OneViewResourceNotFoundException: If any of the OneView
         resources does not exist.
     :raise ElementNotFoundException: If the UplinkSet name is not
@@ -612,13 +614,14 @@ def check_valid_resources():
         to any UplinkSet.
     """
     LOG.info("Checking if resources in mappings exist in OneView.")
-    check_uplinkset_mappings_resources()
-    check_flat_net_mappings_resources()
+    check_uplinkset_mappings_resources(oneview_client)
+    check_flat_net_mappings_resources(oneview_client)
 
 
-def check_uplinkset_mappings_resources():
+def check_uplinkset_mappings_resources(oneview_client):
     """Verify if the Logical Interconnect Groups and UplinkSets exist.
 
+    :param oneview_client: a instance of the OneView Client;
     :raise ClientException:: If a Logical Interconnect Group does not exist
         or if a UplinkSet name is not in the LIG's UplinkSets list.
     """
@@ -633,7 +636,8 @@ def check_uplinkset_mappings_resources():
         # Check if Logical Interconnect Groups and UplinkSets exist
         for lig_id, uplinkset_name in provider:
             try:
-                lig = get_logical_interconnect_group_by_id(lig_id)
+                lig = get_logical_interconnect_group_by_id(
+                    oneview_client, lig_id)
             except exceptions.OneViewResourceNotFoundException:
                 errors["ligs"].append(lig_id)
                 continue
@@ -662,9 +666,10 @@ def check_uplinkset_mappings_resources():
         raise exceptions.ClientException(err_msg)
 
 
-def check_flat_net_mappings_resources():
+def check_flat_net_mappings_resources(oneview_client):
     """Verify if the Ethernet Networks exist.
 
+    :param oneview_client: a instance of the OneView Client;
     :raise ClientException: If an Ethernet Network does not exist
         or If there is no UplinkSet associated with the Network.
     """
@@ -675,13 +680,13 @@ def check_flat_net_mappings_resources():
         oneview_network_ids = mappings.get(physnet)
         for oneview_network_id in oneview_network_ids:
             try:
-                get_ethernet_network_by_id(oneview_network_id)
+                get_ethernet_network_by_id(oneview_client, oneview_network_id)
             except exceptions.OneViewResourceNotFoundException:
                 errors["networks"].append(oneview_network_id)
                 continue
 
             if not get_uplink_port_group_uris_for_ethernet_network_by_id(
-                    oneview_network_id):
+                    oneview_client, oneview_network_id):
                 errors["no_uplinkset"].append(oneview_network_id)
 
     if errors["networks"] or errors["no_uplinkset"]:
@@ -700,41 +705,41 @@ def check_flat_net_mappings_resources():
         raise exceptions.ClientException(err_msg)
 
 
-def uplinkset_mappings_by_type(uplinkset_mappings):
-    uplinkset_by_type = {}
-
-    uplinkset_by_type[NETWORK_TYPE_TAGGED] = (
-        get_uplinkset_by_type(
-            uplinkset_mappings, NETWORK_TYPE_TAGGED
-        )
-    )
-
-    uplinkset_by_type[NETWORK_TYPE_UNTAGGED] = (
-        get_uplinkset_by_type(
-            uplinkset_mappings, NETWORK_TYPE_UNTAGGED
-        )
-    )
-
-    return uplinkset_by_type
+def uplinkset_mappings_by_type(oneview_client, uplinkset_mappings):
+    """Split the uplinkset mappings by the type of their uplinksets.
 
+    Each Logical Interconnect Group in the mappings is retrieved only
+    once, and its uplinksets are partitioned in a single pass.
 
-def get_uplinkset_by_type(uplinkset_mappings, net_type):
-    uplinksets_by_type = {}
+    :param oneview_client: a instance of the OneView Client;
+    :param uplinkset_mappings: the uplinkset mappings, as returned by
+        load_conf_option_to_dict;
+    :returns: a dict with the tagged and untagged uplinkset mappings
+    """
+    uplinkset_by_type = {
+        NETWORK_TYPE_TAGGED: {},
+        NETWORK_TYPE_UNTAGGED: {},
+    }
+    ligs = {}
 
     for physnet in uplinkset_mappings:
         provider = uplinkset_mappings.get(physnet)
         for lig_id, uplinkset_name in zip(provider[0::2], provider[1::2]):
-            lig = get_logical_interconnect_group_by_id(lig_id)
-            lig_uplinksets = lig.get('uplinkSets')
+            if lig_id not in ligs:
+                ligs[lig_id] = get_logical_interconnect_group_by_id(
+                    oneview_client, lig_id)
+            lig_uplinksets = ligs[lig_id].get('uplinkSets')
 
             uplinkset = get_uplinkset_by_name_from_list(
                 lig_uplinksets, uplinkset_name
             )
-            if uplinkset.get('ethernetNetworkType').lower() == net_type:
-                uplinksets_by_type.setdefault(physnet, []).extend(
+            net_type = uplinkset.get('ethernetNetworkType').lower()
+            if net_type in uplinkset_by_type:
+                uplinkset_by_type[net_type].setdefault(physnet, []).extend(
                     [lig_id, uplinkset_name]
                 )
-    return uplinksets_by_type
+
+    return uplinkset_by_type
 
 
 def check_uplinkset_types_constraint(oneview_client, uplinkset_mappings):
@@ -820,8 +825,21 @@ def delete_outdated_flat_mapped_networks(flat_net_mappings):
             session, oneview_network_id=uuid)
 
 
+def _get_engine(connection):
+    """Get the engine of a database connection URL.
+
+    Engines are created once per connection URL, so every session shares
+    the engine's connection pool.
+    """
+    engine = _engines.get(connection)
+    if engine is None:
+        engine = create_engine(connection)
+        _engines[connection] = engine
+    return engine
+
+
 def get_database_session():
     connection = CONF.database.connection
-    Session = sessionmaker(bind=create_engine(connection),
+    Session = sessionmaker(bind=_get_engine(connection),
                            autocommit=True)
     return Session()
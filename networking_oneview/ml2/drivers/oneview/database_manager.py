@@ -57,6 +57,45 @@ def list_networks_and_segments_with_physnet(session):
             NetworkSegment.physical_network.isnot(None)).all()
 
 
+# NOTE: Callers of the queries below only read the networks' and segments'
+# own columns, so the eager loading of their relationships is disabled.
+def _unmapped_networks_with_segments_query(session):
+    return session.query(Network, NetworkSegment).join(
+        NetworkSegment, Network.id == NetworkSegment.network_id
+    ).outerjoin(
+        NeutronOneviewNetwork,
+        Network.id == NeutronOneviewNetwork.neutron_network_id
+    ).filter(
+        NetworkSegment.physical_network.isnot(None),
+        NeutronOneviewNetwork.neutron_network_id.is_(None)
+    ).enable_eagerloads(False)
+
+
+def list_unmapped_networks_with_segments(session):
+    with session.begin(subtransactions=True):
+        return _unmapped_networks_with_segments_query(session).all()
+
+
+def _mapped_networks_with_segments_and_ligs_query(session):
+    return session.query(
+        NeutronOneviewNetwork, NetworkSegment,
+        OneviewLogicalInterconnectGroup
+    ).join(
+        NetworkSegment,
+        NeutronOneviewNetwork.neutron_network_id ==
+        NetworkSegment.network_id
+    ).outerjoin(
+        OneviewLogicalInterconnectGroup,
+        NeutronOneviewNetwork.oneview_network_id ==
+        OneviewLogicalInterconnectGroup.oneview_network_id
+    ).enable_eagerloads(False)
+
+
+def list_mapped_networks_with_segments_and_ligs(session):
+    with session.begin(subtransactions=True):
+        return _mapped_networks_with_segments_and_ligs_query(session).all()
+
+
 def get_neutron_network_with_segment(session, network_id):
     with session.begin(subtransactions=True):
         return session.query(Network, NetworkSegment).filter(
@@ -84,15 +123,20 @@ def get_port_with_binding_profile_by_net(session, network_id):
 # OneView Mechanism driver_api
 def map_neutron_network_to_oneview(
         session, neutron_network_id, oneview_network_id, manageable, mappings):
-    insert_neutron_oneview_network(
-        session, neutron_network_id, oneview_network_id, manageable
-    )
-
-    if not mappings:
-        return
-    for lig_id, uplinkset_name in zip(mappings[0::2], mappings[1::2]):
-        insert_oneview_network_lig(
-            session, oneview_network_id, lig_id, uplinkset_name
+    with session.begin(subtransactions=True):
+        insert_neutron_oneview_network(
+            session, neutron_network_id, oneview_network_id, manageable
+        )
+
+        if not mappings:
+            return
+        session.execute(
+            OneviewLogicalInterconnectGroup.__table__.insert(), [{
+                'oneview_network_id': oneview_network_id,
+                'oneview_lig_id': lig_id,
+                'oneview_uplinkset_name': uplinkset_name
+            } for lig_id, uplinkset_name in zip(
+                mappings[0::2], mappings[1::2])]
         )
 
 
@@ -39,7 +39,7 @@ class OneViewDriver(api.MechanismDriver):
         self.flat_net_mappings = common.load_conf_option_to_dict(
             CONF.DEFAULT.flat_net_mappings)
 
-        common.check_valid_resources()
+        common.check_valid_resources(self.oneview_client)
         common.check_uplinkset_types_constraint(
             self.oneview_client, self.uplinkset_mappings)
         common.check_unique_lig_per_provider_constraint(
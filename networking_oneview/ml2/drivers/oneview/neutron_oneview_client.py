@@ -14,8 +14,10 @@
 #    under the License.
 
 import abc
+import collections
 import six
 
+import futurist
 from oslo_log import log
 from oslo_utils import importutils
 
@@ -27,6 +29,8 @@ LOG = log.getLogger(__name__)
 
 oneview_exceptions = importutils.try_import('hpOneView.exceptions')
 
+MAX_UPLINKSET_WORKERS = 8
+
 
 @six.add_metaclass(abc.ABCMeta)
 class ResourceManager(object):
@@ -34,27 +38,61 @@ class ResourceManager(object):
         self.oneview_client = oneview_client
         self.uplinkset_mappings = uplinkset_mappings
         self.flat_net_mappings = flat_net_mappings
+        self._managed_physnets = self._get_managed_physnets()
+
+    def _get_managed_physnets(self):
+        """Get the physical networks managed by the driver, by OneView type.
+
+        The mappings are only set when the driver is initialized, so the
+        sets are built once instead of being looked up on every call of
+        is_uplinkset_mapping.
+        """
+        def mapped_physnets(mappings):
+            return set(
+                physnet for physnet, mapping in mappings.items() if mapping)
+
+        flat_physnets = mapped_physnets(self.flat_net_mappings)
+        return {
+            common.NETWORK_TYPE_TAGGED: flat_physnets | mapped_physnets(
+                self.uplinkset_mappings.get(common.NETWORK_TYPE_TAGGED)),
+            common.NETWORK_TYPE_UNTAGGED: flat_physnets | mapped_physnets(
+                self.uplinkset_mappings.get(common.NETWORK_TYPE_UNTAGGED)),
+        }
 
-    def is_uplinkset_mapping(self, physical_network, network_type):
-        if self._is_physnet_in_uplinkset_mapping(
-                physical_network, network_type):
-            return True
-
-        if self.flat_net_mappings.get(physical_network):
-            return True
-
-        return False
-
-    def _is_physnet_in_uplinkset_mapping(self, physical_network, network_type):
-        network_type = (
+    def _get_uplinkset_type(self, network_type):
+        return (
             common.NETWORK_TYPE_UNTAGGED if network_type == 'flat' else (
                 common.NETWORK_TYPE_TAGGED
             )
         )
-        if self.uplinkset_mappings.get(network_type).get(physical_network):
-            return True
 
-        return False
+    def is_uplinkset_mapping(self, physical_network, network_type):
+        return physical_network in self._managed_physnets[
+            self._get_uplinkset_type(network_type)]
+
+    def _resolve_mapping(self, physical_network, network_type):
+        """Resolve how a physical network and network type map to OneView.
+
+        :param physical_network: The Neutron physical network name;
+        :param network_type: The Neutron network type;
+        :returns: A tuple (mapping_type, lig_list). mapping_type is
+            MAPPING_TYPE_UNMAPPED if the physical network is not mapped at
+            all, and MAPPING_TYPE_NONE if it is mapped but not for this
+            network type. lig_list is only set for uplinkset mappings;
+        """
+        lig_list = self.uplinkset_mappings.get(
+            self._get_uplinkset_type(network_type)).get(physical_network)
+
+        if lig_list and network_type == 'vlan':
+            return common.UPLINKSET_MAPPINGS_TYPE, lig_list
+        if self.flat_net_mappings.get(physical_network):
+            return common.FLAT_NET_MAPPINGS_TYPE, None
+        if lig_list and network_type == 'flat':
+            return common.UPLINKSET_MAPPINGS_TYPE, lig_list
+        if lig_list:
+            return common.MAPPING_TYPE_NONE, None
+
+        return common.MAPPING_TYPE_UNMAPPED, None
 
     def update_server_hardware_power_state(self, server_hardware, state):
         configuration = {
@@ -80,11 +118,11 @@ class Network(ResourceManager):
         network_seg_id = network_dict.get('provider:segmentation_id')
         physical_network = network_dict.get('provider:physical_network')
         network_type = network_dict.get('provider:network_type')
-        mapping_type = self._get_network_mapping_type(
+        mapping_type, lig_list = self._resolve_mapping(
             physical_network, network_type
         )
 
-        if not self.is_uplinkset_mapping(physical_network, network_type):
+        if mapping_type == common.MAPPING_TYPE_UNMAPPED:
             LOG.warning(
                 "The network %s is not mapped in OneView "
                 "configuration file.", network_id)
@@ -95,7 +133,7 @@ class Network(ResourceManager):
                 "The network %s is already created.", network_id)
             return
 
-        if not mapping_type:
+        if mapping_type == common.MAPPING_TYPE_NONE:
             LOG.warning(
                 "The network: %s type is not supported.", network_id)
             return
@@ -110,7 +148,8 @@ class Network(ResourceManager):
             oneview_network_id = common.id_from_uri(oneview_network.get('uri'))
             try:
                 mappings = self._add_to_ligs(
-                    network_type, physical_network, oneview_network.get('uri'))
+                    network_type, physical_network, oneview_network.get('uri'),
+                    lig_list=lig_list)
             except Exception:
                 LOG.warning("Network Creation failed, deleting OneView "
                             "Network: %s" % oneview_network_id)
@@ -126,19 +165,6 @@ class Network(ResourceManager):
 
         LOG.info("Network %s created.", network_id)
 
-    def _get_network_mapping_type(self, physical_network, network_type):
-        physnet_in_uplinkset_mapping = self._is_physnet_in_uplinkset_mapping(
-            physical_network, network_type
-        )
-        if network_type == 'vlan' and physnet_in_uplinkset_mapping:
-            return common.UPLINKSET_MAPPINGS_TYPE
-        elif physical_network in self.flat_net_mappings:
-            return common.FLAT_NET_MAPPINGS_TYPE
-        elif network_type == 'flat' and physnet_in_uplinkset_mapping:
-            return common.UPLINKSET_MAPPINGS_TYPE
-
-        return common.MAPPING_TYPE_NONE
-
     def _get_lig_list(self, physical_network, network_type):
         mappings_by_type = self.uplinkset_mappings.get(network_type)
         mappings_by_physical_network = mappings_by_type.get(physical_network)
@@ -185,8 +211,10 @@ class Network(ResourceManager):
         }
         return self.oneview_client.ethernet_networks.create(options)
 
-    def _add_to_ligs(self, network_type, physical_network, oneview_net_uri):
-        lig_list = self._get_lig_list(physical_network, network_type)
+    def _add_to_ligs(self, network_type, physical_network, oneview_net_uri,
+                     lig_list=None):
+        if lig_list is None:
+            lig_list = self._get_lig_list(physical_network, network_type)
         uplinksets_list = self._get_uplinksets_from_lig(
             network_type, lig_list)
         self._add_network_to_logical_interconnect_group(
@@ -199,7 +227,8 @@ class Network(ResourceManager):
         for lig_id, uplinkset_name in zip(
                 uplinkset_mappings[0::2], uplinkset_mappings[1::2]):
             logical_interconnect_group = (
-                common.get_logical_interconnect_group_by_id(lig_id)
+                common.get_logical_interconnect_group_by_id(
+                    self.oneview_client, lig_id)
             )
             lig_uplinksets = logical_interconnect_group.get('uplinkSets')
             lig_uri = logical_interconnect_group.get('uri')
@@ -219,19 +248,58 @@ class Network(ResourceManager):
                     raise err
 
     def _add_network_to_uplink_sets(self, uplinkset_list, network_uri):
-        for uplinkset in uplinkset_list:
-            uplinksets_uri = uplinkset.get('uri')
-            if network_uri not in uplinkset['networkUris']:
+        uplinksets_uri_list = [
+            uplinkset.get('uri') for uplinkset in uplinkset_list
+            if network_uri not in uplinkset['networkUris']]
+
+        def log_error(uplinksets_uri, err):
+            LOG.error("Driver couldn't add network %(network_uri)s to "
+                      "uplink set: %(uplinksets_uri)s. %(error)s" % {
+                          'network_uri': network_uri,
+                          'uplinksets_uri': uplinksets_uri,
+                          'error': err})
+
+        self._run_on_uplink_sets(
+            self.oneview_client.uplink_sets.add_ethernet_networks,
+            uplinksets_uri_list, network_uri, log_error)
+
+    def _run_on_uplink_sets(
+            self, uplinkset_action, uplinksets_id_list, network,
+            log_error=None):
+        """Run an uplink set action on several uplink sets concurrently.
+
+        Every uplink set is updated by an independent OneView request, so
+        the requests are dispatched together instead of one after the
+        other. The first error raised is re-raised once all requests
+        have finished.
+
+        :param uplinkset_action: a callable receiving an uplink set id or
+            uri and the network;
+        :param uplinksets_id_list: a list of uplink set ids or uris;
+        :param network: the network id or uri passed to uplinkset_action;
+        :param log_error: an optional callable receiving the uplink set
+            and the exception of each failed request;
+        """
+        if not uplinksets_id_list:
+            return
+
+        max_workers = min(MAX_UPLINKSET_WORKERS, len(uplinksets_id_list))
+        first_error = None
+        with futurist.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                (uplinkset_id, executor.submit(
+                    uplinkset_action, uplinkset_id, network))
+                for uplinkset_id in uplinksets_id_list]
+            for uplinkset_id, future in futures:
                 try:
-                    self.oneview_client.uplink_sets.add_ethernet_networks(
-                        uplinksets_uri, network_uri)
-                except oneview_exceptions.HPOneViewException as err:
-                    LOG.error("Driver couldn't add network %(network_uri)s to "
-                              "uplink set: %(uplinksets_uri)s. %(error)s" % {
-                                  'network_uri': network_uri,
-                                  'uplinksets_uri': uplinksets_uri,
-                                  'error': err})
-                    raise err
+                    future.result()
+                except Exception as err:
+                    if log_error:
+                        log_error(uplinkset_id, err)
+                    first_error = first_error or err
+
+        if first_error:
+            raise first_error
 
     def delete(self, session, network_dict):
         network_id = network_dict.get('id')
@@ -254,40 +322,35 @@ class Network(ResourceManager):
         LOG.info("Network %s deleted", oneview_network_id)
 
     def update_network_lig(
-            self, session, oneview_network_id, network_type, physical_network):
+            self, session, oneview_network_id, network_type, physical_network,
+            mapped_ligs=None):
         network_type = self.NEUTRON_NET_TYPE_TO_ONEVIEW_NET_TYPE.get(
             network_type)
         mappings = self.uplinkset_mappings.get(network_type).get(
-            physical_network)
-        if mappings is None:
-            mappings = []
-        mapped_ligs = database_manager.list_oneview_network_lig(
-            session, oneview_network_id=oneview_network_id)
-        for lig_bd_entry in mapped_ligs:
-            if not common.is_lig_id_uplink_name_mapped(lig_bd_entry, mappings):
-                self._remove_network_from_lig_and_lis(
-                    oneview_network_id,
-                    lig_bd_entry.get('oneview_lig_id'),
-                    lig_bd_entry.get('oneview_uplinkset_name'), network_type
-                )
-                database_manager.delete_oneview_network_lig(
-                    session, oneview_network_id=oneview_network_id,
-                    oneview_lig_id=lig_bd_entry.get('oneview_lig_id'),
-                    oneview_uplinkset_name=lig_bd_entry.get(
-                        'oneview_uplinkset_name'))
+            physical_network) or []
+        if mapped_ligs is None:
+            mapped_ligs = database_manager.list_oneview_network_lig(
+                session, oneview_network_id=oneview_network_id)
+        current_mappings = set(
+            (lig_bd_entry.get('oneview_lig_id'),
+             lig_bd_entry.get('oneview_uplinkset_name'))
+            for lig_bd_entry in mapped_ligs)
+        desired_mappings = set(zip(mappings[0::2], mappings[1::2]))
+        for lig_id, uplinkset_name in current_mappings - desired_mappings:
+            self._remove_network_from_lig_and_lis(
+                oneview_network_id, lig_id, uplinkset_name, network_type
+            )
+            database_manager.delete_oneview_network_lig(
+                session, oneview_network_id=oneview_network_id,
+                oneview_lig_id=lig_id,
+                oneview_uplinkset_name=uplinkset_name)
         self._add_to_ligs(
             network_type, physical_network,
             self.oneview_client.ethernet_networks.get(oneview_network_id))
-        for lig_id, uplinkset_name in zip(mappings[0::2], mappings[1::2]):
-            network_mapped = database_manager.get_oneview_network_lig(
-                session,
-                oneview_network_id=oneview_network_id,
-                oneview_lig_id=lig_id,
-                oneview_uplinkset_name=uplinkset_name)
-            if not network_mapped:
-                database_manager.insert_oneview_network_lig(
-                    session, oneview_network_id, lig_id, uplinkset_name
-                )
+        for lig_id, uplinkset_name in desired_mappings - current_mappings:
+            database_manager.insert_oneview_network_lig(
+                session, oneview_network_id, lig_id, uplinkset_name
+            )
 
     def _remove_network_from_lig_and_lis(
             self, network_id, lig_id, uplinkset_name, network_type):
@@ -298,7 +361,7 @@ class Network(ResourceManager):
             lig_uplinksets, uplinkset_name
         )
         uplinkset['networkUris'].remove(
-            '/rest/ethernet-networks/' + network_id)
+            common.network_uri_from_id(network_id))
         self.oneview_client.logical_interconnect_groups.update(
             lig
         )
@@ -311,15 +374,94 @@ class Network(ResourceManager):
         if not uplinksets_id_list:
             return
 
-        uplinksets_id_list = list(uplinksets_id_list)
-        for uplinkset_id in uplinksets_id_list:
-            self.oneview_client.uplink_sets.remove_ethernet_networks(
-                uplinkset_id, network_id
-            )
+        self._run_on_uplink_sets(
+            self.oneview_client.uplink_sets.remove_ethernet_networks,
+            list(uplinksets_id_list), network_id)
 
 
 class Port(ResourceManager):
-    def create(self, session, port_dict):
+    def create(self, session, port_dict, neutron_oneview_network=None):
+        neutron_oneview_networks = {}
+        if neutron_oneview_network is not None:
+            neutron_oneview_networks[port_dict.get('network_id')] = (
+                neutron_oneview_network)
+        self.create_batch(session, [port_dict], neutron_oneview_networks)
+
+    def create_batch(self, session, port_dicts, neutron_oneview_networks=None):
+        """Create the connections of several ports on OneView.
+
+        Ports are grouped by Server Hardware, so the Server Hardware and
+        its Server Profile are retrieved once per group and the Server
+        Profile is updated, with a single power cycle, once per group.
+
+        :param session: The database session;
+        :param port_dicts: A list of Neutron port dicts;
+        :param neutron_oneview_networks: The known network mappings of the
+            ports, by Neutron network id. The others are retrieved from
+            the database once per network;
+        """
+        neutron_oneview_networks = dict(neutron_oneview_networks or {})
+        ports_by_server_hardware = collections.OrderedDict()
+        for port_dict in port_dicts:
+            network_id = port_dict.get('network_id')
+            checked_port = self._check_port(
+                session, port_dict, neutron_oneview_networks.get(network_id))
+            if not checked_port:
+                continue
+            local_link_information_list, neutron_oneview_network = (
+                checked_port)
+            neutron_oneview_networks[network_id] = neutron_oneview_network
+            network_uri = common.network_uri_from_id(
+                neutron_oneview_network.oneview_network_id)
+            switch_info = common.switch_info_from_local_link_information_list(
+                local_link_information_list)
+            ports_by_server_hardware.setdefault(
+                switch_info.get('server_hardware_id'), []).append(
+                    (port_dict, local_link_information_list, network_uri))
+
+        for ports in ports_by_server_hardware.values():
+            server_hardware = (
+                common.server_hardware_from_local_link_information_list(
+                    self.oneview_client, ports[0][1]))
+            server_profile = common.server_profile_from_server_hardware(
+                self.oneview_client, server_hardware
+            )
+            if not server_profile:
+                continue
+            LOG.info("There is Server Profile %s available.", server_profile)
+
+            if common.is_rack_server(server_hardware):
+                LOG.warning("The server hardware %s is a rack server.",
+                            server_hardware.get('uuid'))
+                continue
+
+            changed_port_ids = []
+            for port_dict, local_link_information_list, network_uri in ports:
+                if self._add_connection(
+                        server_hardware, server_profile, port_dict,
+                        local_link_information_list, network_uri):
+                    changed_port_ids.append(port_dict.get('id'))
+            if not changed_port_ids:
+                continue
+
+            common.check_oneview_entities_availability(
+                self.oneview_client, server_hardware)
+            self._update_oneview_entities(server_hardware, server_profile)
+            for neutron_port_id in changed_port_ids:
+                LOG.info("The connection of port %s was updated/created.",
+                         neutron_port_id)
+
+    def _check_port(self, session, port_dict, neutron_oneview_network):
+        """Check if a port must be reflected on OneView.
+
+        :param session: The database session;
+        :param port_dict: The Neutron port dict;
+        :param neutron_oneview_network: The port's network mapping, or None
+            to retrieve it from the database;
+        :returns: A tuple (local_link_information_list,
+            neutron_oneview_network), or None if the port must not be
+            reflected on OneView;
+        """
         network_id = port_dict.get('network_id')
         neutron_port_id = port_dict.get('id')
 
@@ -332,79 +474,82 @@ class Port(ResourceManager):
             LOG.warning(
                 "The port's network %s is not mapping in OneView "
                 "configuration file", network_id)
-            return
+            return None
         local_link_information_list = common.local_link_information_from_port(
             port_dict
         )
-
-        if not common.is_port_valid_to_reflect_on_oneview(
-                session, port_dict, local_link_information_list):
+        neutron_oneview_network = common.valid_port_neutron_oneview_network(
+            session, port_dict, local_link_information_list,
+            neutron_oneview_network)
+        if not neutron_oneview_network:
             LOG.warning(
                 "Port %s is not valid to reflect on OneView.", neutron_port_id)
-            return
+            return None
 
-        neutron_oneview_network = database_manager.get_neutron_oneview_network(
-            session, network_id)
-        network_uri = common.network_uri_from_id(
-            neutron_oneview_network.oneview_network_id)
-        server_hardware = (
-            common.server_hardware_from_local_link_information_list(
-                self.oneview_client, local_link_information_list))
-        server_profile = common.server_profile_from_server_hardware(
-            self.oneview_client, server_hardware
-        )
-        if server_profile:
-            LOG.info("There is Server Profile %s available.", server_profile)
+        return local_link_information_list, neutron_oneview_network
 
-            mac_address = port_dict.get('mac_address')
-            if common.is_rack_server(server_hardware):
-                LOG.warning("The server hardware %s is a rack server.",
-                            server_hardware.get('uuid'))
-                return
-
-            port_id = common.port_id_from_mac(server_hardware, mac_address)
-            connections = server_profile.get('connections')
-            existing_connections = [connection for connection in connections
-                                    if connection.get('portId') == port_id]
-            switch_info = common.switch_info_from_local_link_information_list(
-                local_link_information_list)
-            bootable = switch_info.get('bootable')
-            boot_priority = common.get_boot_priority(server_profile, bootable)
+    def _add_connection(
+            self, server_hardware, server_profile, port_dict,
+            local_link_information_list, network_uri):
+        """Add or update the connection of a port in a Server Profile.
 
-            if not boot_priority:
-                LOG.warning("The server profile: %s already has PXE primary "
-                            "and secondary bootable connections." %
-                            server_profile.get('uuid'))
-                return
+        Only the local server_profile is changed, it is not updated on
+        OneView.
 
-            create_new_connection = True
-            for connection in existing_connections:
-                if connection.get('mac').upper() == mac_address.upper():
+        :returns: True if server_profile was changed, False otherwise;
+        """
+        mac_address = port_dict.get('mac_address')
+        port_id = common.port_id_from_mac(server_hardware, mac_address)
+        if port_id is None:
+            LOG.warning("The MAC address %s is not in the port map of the "
+                        "server hardware %s.", mac_address,
+                        server_hardware.get('uuid'))
+            return False
+        connections = server_profile.get('connections')
+        existing_connections = [connection for connection in connections
+                                if connection.get('portId') == port_id]
+        switch_info = common.switch_info_from_local_link_information_list(
+            local_link_information_list)
+        bootable = switch_info.get('bootable')
+        boot_priority = common.get_boot_priority(server_profile, bootable)
+
+        if not boot_priority:
+            LOG.warning("The server profile: %s already has PXE primary "
+                        "and secondary bootable connections." %
+                        server_profile.get('uuid'))
+            return False
+
+        create_new_connection = True
+        connection_updated = False
+        for connection in existing_connections:
+            if connection.get('mac').upper() == mac_address.upper():
+                create_new_connection = False
+                if connection.get('networkUri') != network_uri:
                     connection['networkUri'] = network_uri
-                    create_new_connection = False
-            if create_new_connection:
-                server_profile['connections'].append({
-                    'name': "NeutronPort[%s]" % mac_address,
-                    'portId': port_id,
-                    'networkUri': network_uri,
-                    'boot': {'priority': boot_priority},
-                    'functionType': 'Ethernet'
-                })
-
-            common.check_oneview_entities_availability(
-                self.oneview_client, server_hardware)
-            self._update_oneview_entities(server_hardware, server_profile)
-            LOG.info("The requested connection %s was updated/created.",
-                     port_id)
-
-    def delete(self, session, port_dict):
+                    connection_updated = True
+        if not (create_new_connection or connection_updated):
+            LOG.info("The requested connection %s is already up to "
+                     "date.", port_id)
+            return False
+        if create_new_connection:
+            server_profile['connections'].append({
+                'name': "NeutronPort[%s]" % mac_address,
+                'portId': port_id,
+                'networkUri': network_uri,
+                'boot': {'priority': boot_priority},
+                'functionType': 'Ethernet'
+            })
+        return True
+
+    def delete(self, session, port_dict, neutron_oneview_network=None):
         local_link_information_list = common.local_link_information_from_port(
             port_dict
         )
         neutron_port_id = port_dict.get('id')
 
         if not common.is_port_valid_to_reflect_on_oneview(
-                session, port_dict, local_link_information_list):
+                session, port_dict, local_link_information_list,
+                neutron_oneview_network):
             LOG.warning(
                 "Port %s is not valid to reflect on OneView.", neutron_port_id)
             return
@@ -425,11 +570,12 @@ class Port(ResourceManager):
             connection = common.connection_with_mac_address(
                 server_profile.get('connections'), mac_address
             )
-            if connection:
-                LOG.debug("There is Connection %s available.", connection)
-                server_profile.get('connections').remove(connection)
-            else:
+            if not connection:
                 LOG.debug("There is no Connection available.")
+                return
+
+            LOG.debug("There is Connection %s available.", connection)
+            server_profile.get('connections').remove(connection)
 
             common.check_oneview_entities_availability(
                 self.oneview_client, server_hardware)
@@ -454,7 +600,7 @@ class Client(object):
     def __init__(self, oneview_client, uplinkset_mappings, flat_net_mappings):
         self.oneview_client = oneview_client
         self.uplinkset_mappings = common.uplinkset_mappings_by_type(
-            uplinkset_mappings
+            self.oneview_client, uplinkset_mappings
         )
         self.__network = Network(
             self.oneview_client, self.uplinkset_mappings, flat_net_mappings
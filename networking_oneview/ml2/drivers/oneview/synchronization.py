@@ -44,7 +44,7 @@ class Synchronization(object):
     @common.oneview_reauth
     def synchronize(self):
         LOG.info("Starting synchronization mechanism.")
-        common.check_valid_resources()
+        common.check_valid_resources(self.oneview_client)
         self.create_oneview_networks_from_neutron()
 
         force_delete = common.CONF.DEFAULT.force_sync_delete_ops
@@ -65,26 +65,11 @@ class Synchronization(object):
     def create_oneview_networks_from_neutron(self):
         LOG.info("Synchronizing Neutron networks not in OneView.")
         session = common.get_database_session()
+        self._remove_inconsistent_network_mappings(session)
         for network, network_segment in (
-                database_manager.list_networks_and_segments_with_physnet(
+                database_manager.list_unmapped_networks_with_segments(
                     session)):
             net_id = network.get('id')
-            neutron_oneview_network = (
-                database_manager.get_neutron_oneview_network(
-                    session, net_id))
-            if neutron_oneview_network:
-                oneview_network = self.get_oneview_network(
-                    neutron_oneview_network.oneview_network_id
-                )
-                if not oneview_network:
-                    common.remove_inconsistence_from_db(
-                        session,
-                        neutron_oneview_network.neutron_network_id,
-                        neutron_oneview_network.oneview_network_id
-                    )
-                else:
-                    continue
-
             physical_network = network_segment.get('physical_network')
             network_type = network_segment.get('network_type')
             segmentation_id = network_segment.get('segmentation_id')
@@ -94,21 +79,39 @@ class Synchronization(object):
 
             self.neutron_client.network.create(session, network_dict)
 
-    def synchronize_uplinkset_from_mapped_networks(self):
-        LOG.info("Synchronizing OneView uplinksets.")
-        session = common.get_database_session()
+    def _remove_inconsistent_network_mappings(self, session):
         for neutron_oneview_network in (
                 database_manager.list_neutron_oneview_network(session)):
-            oneview_network_id = neutron_oneview_network.oneview_network_id
-            neutron_network_id = neutron_oneview_network.neutron_network_id
-            network_segment = database_manager.get_network_segment(
-                session, neutron_network_id
+            oneview_network = self.get_oneview_network(
+                neutron_oneview_network.oneview_network_id
             )
-            if network_segment:
-                self.neutron_client.network.update_network_lig(
-                    session, oneview_network_id, network_segment.get(
-                        'network_type'), network_segment.get(
-                            'physical_network'))
+            if not oneview_network:
+                common.remove_inconsistence_from_db(
+                    session,
+                    neutron_oneview_network.neutron_network_id,
+                    neutron_oneview_network.oneview_network_id
+                )
+
+    def synchronize_uplinkset_from_mapped_networks(self):
+        LOG.info("Synchronizing OneView uplinksets.")
+        session = common.get_database_session()
+        mapped_networks = {}
+        for neutron_oneview_network, network_segment, network_lig in (
+                database_manager.list_mapped_networks_with_segments_and_ligs(
+                    session)):
+            _, _, mapped_ligs = mapped_networks.setdefault(
+                neutron_oneview_network.neutron_network_id, (
+                    neutron_oneview_network.oneview_network_id,
+                    network_segment, []))
+            if network_lig is not None and network_lig not in mapped_ligs:
+                mapped_ligs.append(network_lig)
+
+        for oneview_network_id, network_segment, mapped_ligs in (
+                mapped_networks.values()):
+            self.neutron_client.network.update_network_lig(
+                session, oneview_network_id, network_segment.get(
+                    'network_type'), network_segment.get(
+                        'physical_network'), mapped_ligs=mapped_ligs)
 
     def delete_unmapped_oneview_networks(self):
         LOG.info("Synchronizing outdated networks in OneView.")
@@ -148,6 +151,7 @@ class Synchronization(object):
 
     def _delete_connections(self, neutron_network_id):
         session = common.get_database_session()
+        server_hardware_cache = {}
         for port, port_binding in (
                 database_manager.get_port_with_binding_profile_by_net(
                     session, neutron_network_id)):
@@ -158,23 +162,21 @@ class Synchronization(object):
             )
             local_link_info = common.local_link_information_from_port(
                 port_dict)
-            server_hardware = (
-                common.server_hardware_from_local_link_information_list(
-                    self.oneview_client, local_link_info))
+            server_hardware = self._get_server_hardware(
+                local_link_info, server_hardware_cache)
 
-            server_profile = (
-                self.neutron_client.port.server_profile_from_server_hardware(
-                    server_hardware
-                )
+            server_profile = common.server_profile_from_server_hardware(
+                self.oneview_client, server_hardware
             )
+            if not server_profile:
+                continue
 
-            self.neutron_client.port.check_server_hardware_availability(
-                server_hardware
+            server_hardware = self._refresh_server_hardware(server_hardware)
+            common.check_oneview_entities_availability(
+                self.oneview_client, server_hardware
             )
-            previous_power_state = (
-                self.neutron_client.port.get_server_hardware_power_state(
-                    server_hardware
-                )
+            previous_power_state = common.get_server_hardware_power_state(
+                server_hardware
             )
 
             self.neutron_client.port.update_server_hardware_power_state(
@@ -218,6 +220,9 @@ class Synchronization(object):
         """
         LOG.info("Synchronizing connections in OneView Server Profiles.")
         session = common.get_database_session()
+        server_hardware_cache = {}
+        ports_to_create = []
+        neutron_oneview_networks = {}
 
         for port, port_binding in (
                 database_manager.get_port_with_binding_profile(session)):
@@ -229,47 +234,73 @@ class Synchronization(object):
             )
             local_link_info = common.local_link_information_from_port(
                 port_dict)
-            server_hardware_id = (
-                common.server_hardware_from_local_link_information_list(
-                    self.oneview_client, local_link_info))
-            server_profile = (
-                self.neutron_client.port.server_profile_from_server_hardware(
-                    server_hardware_id
-                )
+            server_hardware = self._get_server_hardware(
+                local_link_info, server_hardware_cache)
+            server_profile = common.server_profile_from_server_hardware(
+                self.oneview_client, server_hardware
             )
+            if not server_profile:
+                continue
             neutron_oneview_network = (
                 database_manager.list_neutron_oneview_network(
                     session, neutron_network_id=port.get('network_id')))
             connection_updated = False
             if neutron_oneview_network:
-                oneview_uri = "/rest/ethernet-networks/" + (
+                oneview_uri = common.network_uri_from_id(
                     neutron_oneview_network[0].oneview_network_id
                 )
                 self._fix_connections_with_removed_networks(
-                    server_profile
+                    server_profile, server_hardware
                 )
                 for c in server_profile.get('connections'):
                     if c.get('mac') == port.get('mac_address'):
                         connection_updated = True
                         if c.get('networkUri') != oneview_uri:
                             self._update_connection(
-                                oneview_uri, server_profile, c)
+                                oneview_uri, server_profile, c,
+                                server_hardware)
             if not connection_updated:
-                self.neutron_client.port.create(session, port_dict)
+                ports_to_create.append(port_dict)
+                if neutron_oneview_network:
+                    neutron_oneview_networks[port.get('network_id')] = (
+                        neutron_oneview_network[0])
+
+        if ports_to_create:
+            self.neutron_client.port.create_batch(
+                session, ports_to_create, neutron_oneview_networks)
+
+    def _get_server_hardware(self, local_link_info, server_hardware_cache):
+        """Get the Server Hardware of a port, fetching it once per pass.
+
+        Several ports are usually bound to the same Server Hardware, so
+        the Server Hardware retrieved from OneView is kept in
+        server_hardware_cache, keyed by its id, for the rest of the pass.
+        It is only meant for read-only lookups, its power state and lock
+        are outdated once it is power cycled. Use _refresh_server_hardware
+        before checking them.
+        """
+        switch_info = common.switch_info_from_local_link_information_list(
+            local_link_info)
+        server_hardware_id = switch_info.get('server_hardware_id')
+        if server_hardware_id not in server_hardware_cache:
+            server_hardware_cache[server_hardware_id] = (
+                common.server_hardware_from_local_link_information_list(
+                    self.oneview_client, local_link_info))
+        return server_hardware_cache[server_hardware_id]
+
+    def _refresh_server_hardware(self, server_hardware):
+        return self.oneview_client.server_hardware.get(
+            server_hardware.get('uuid'))
 
     def _update_connection(
-            self, oneview_uri, server_profile, connection):
-        server_hardware = self.oneview_client.server_hardware.get(
-            server_profile.get('serverHardwareUri')
-        )
+            self, oneview_uri, server_profile, connection, server_hardware):
         connection['networkUri'] = oneview_uri
-        self.neutron_client.port.check_server_hardware_availability(
-            server_hardware
+        server_hardware = self._refresh_server_hardware(server_hardware)
+        common.check_oneview_entities_availability(
+            self.oneview_client, server_hardware
         )
-        previous_power_state = (
-            self.neutron_client.port.get_server_hardware_power_state(
-                server_hardware
-            )
+        previous_power_state = common.get_server_hardware_power_state(
+            server_hardware
         )
         self.neutron_client.port.update_server_hardware_power_state(
             server_hardware, "Off"
@@ -279,17 +310,13 @@ class Synchronization(object):
             id_or_uri=server_profile.get('uri')
         )
         self.neutron_client.port.update_server_hardware_power_state(
-            self.oneview_client.server_hardware.get(
-                server_profile.get('serverHardwareUri')), previous_power_state
+            server_hardware, previous_power_state
         )
 
-    def _fix_connections_with_removed_networks(self, server_profile):
+    def _fix_connections_with_removed_networks(
+            self, server_profile, server_hardware):
         sp_cons = []
 
-        server_hardware = self.oneview_client.server_hardware.get(
-            server_profile.get('serverHardwareUri')
-        )
-
         for connection in server_profile.get('connections'):
             conn_network_id = common.id_from_uri(
                 connection.get('networkUri')
@@ -298,13 +325,12 @@ class Synchronization(object):
                 sp_cons.append(connection)
 
         server_profile['connections'] = sp_cons
-        self.neutron_client.port.check_server_hardware_availability(
-            server_hardware
+        server_hardware = self._refresh_server_hardware(server_hardware)
+        common.check_oneview_entities_availability(
+            self.oneview_client, server_hardware
         )
-        previous_power_state = (
-            self.neutron_client.port.get_server_hardware_power_state(
-                server_hardware
-            )
+        previous_power_state = common.get_server_hardware_power_state(
+            server_hardware
         )
 
         self.neutron_client.port.update_server_hardware_power_state(
@@ -315,6 +341,5 @@ class Synchronization(object):
             id_or_uri=server_profile.get('uri')
         )
         self.neutron_client.port.update_server_hardware_power_state(
-            self.oneview_client.server_hardware.get(
-                server_profile.get('serverHardwareUri')), previous_power_state
+            server_hardware, previous_power_state
         )
@@ -167,6 +167,22 @@ class CommonTestCase(base.AgentMechanismBaseTestCase):
             common.is_port_valid_to_reflect_on_oneview(
                 mock.MagicMock(), port, lli))
 
+    def test_is_local_link_information_valid(self):
+        lli = [{'switch_info': {
+            'server_hardware_id': '1122AA', 'bootable': True}}]
+        self.assertTrue(common.is_local_link_information_valid(lli))
+
+    def test_is_local_link_information_valid_invalid(self):
+        self.assertFalse(common.is_local_link_information_valid(None))
+        self.assertFalse(common.is_local_link_information_valid([{}, {}]))
+        self.assertFalse(common.is_local_link_information_valid(
+            [{'switch_info': None}]))
+        self.assertFalse(common.is_local_link_information_valid(
+            [{'switch_info': {'bootable': True}}]))
+        self.assertFalse(common.is_local_link_information_valid(
+            [{'switch_info': {
+                'server_hardware_id': '1122AA', 'bootable': 'true'}}]))
+
     @mock.patch.object(common, 'OneViewClient', autospec=True)
     def test_get_oneview_client_insecure_cafile(self, mock_oneview_client):
         self.conf.oneview.allow_insecure_connections = True
@@ -176,56 +192,137 @@ class CommonTestCase(base.AgentMechanismBaseTestCase):
 
     @mock.patch.object(common, "get_oneview_client")
     def test_check_flat_net_mappings_resources(self, mock_get_oneview_client):
-        mock_oneview = mock_get_oneview_client()
+        mock_oneview = mock.MagicMock()
         ethernet_networks = mock_oneview.ethernet_networks
         ethernet_networks.get.return_value = (
             test_oneview_mech_driver.FAKE_FLAT_ONEVIEW_NETWORK)
         ethernet_networks.get_associated_uplink_groups.return_value = (
             ['uplinkset/1'])
 
-        common.check_flat_net_mappings_resources()
+        common.check_flat_net_mappings_resources(mock_oneview)
 
-    @mock.patch.object(common, "get_oneview_client")
-    def test_check_flat_net_mappings_resources_fail(
-            self, mock_get_oneview_client):
-        mock_oneview = mock_get_oneview_client()
+        self.assertFalse(mock_get_oneview_client.called)
+
+    def test_check_flat_net_mappings_resources_fail(self):
+        mock_oneview = mock.MagicMock()
         ethernet_networks = mock_oneview.ethernet_networks
         ethernet_networks.get.side_effect = (
-            exceptions.OneViewResourceNotFoundException())
+            oneview_exceptions.HPOneViewException("BOOM"))
 
         self.assertRaises(exceptions.ClientException,
-                          common.check_flat_net_mappings_resources)
+                          common.check_flat_net_mappings_resources,
+                          mock_oneview)
 
-    @mock.patch.object(common, "get_oneview_client")
-    def test_check_flat_net_mappings_resources_no_uplinkset(
-            self, mock_get_oneview_client):
-        mock_oneview = mock_get_oneview_client()
+    def test_check_flat_net_mappings_resources_no_uplinkset(self):
+        mock_oneview = mock.MagicMock()
         ethernet_networks = mock_oneview.ethernet_networks
         ethernet_networks.get.return_value = (
             test_oneview_mech_driver.FAKE_FLAT_ONEVIEW_NETWORK)
         ethernet_networks.get_associated_uplink_groups.return_value = []
 
         self.assertRaises(exceptions.ClientException,
-                          common.check_flat_net_mappings_resources)
+                          common.check_flat_net_mappings_resources,
+                          mock_oneview)
 
     @mock.patch.object(common, "get_oneview_client")
     def test_check_uplinkset_mappings_resources(self, mock_get_oneview_client):
-        mock_oneview = mock_get_oneview_client()
+        mock_oneview = mock.MagicMock()
         mock_oneview.logical_interconnect_groups.get.return_value = (
             test_oneview_mech_driver.FAKE_LIG)
 
-        common.check_uplinkset_mappings_resources()
+        common.check_uplinkset_mappings_resources(mock_oneview)
 
-    @mock.patch.object(common, "get_oneview_client")
-    def test_check_uplinkset_mappings_resources_fail(
-            self, mock_get_oneview_client):
+        self.assertFalse(mock_get_oneview_client.called)
+
+    def test_check_uplinkset_mappings_resources_fail(self):
         self.conf.DEFAULT.uplinkset_mappings = 'does:not:exist,neither:do:I'
-        mock_oneview = mock_get_oneview_client()
+        mock_oneview = mock.MagicMock()
         mock_oneview.logical_interconnect_groups.get.return_value = (
             test_oneview_mech_driver.FAKE_LIG)
 
         self.assertRaises(exceptions.ClientException,
-                          common.check_uplinkset_mappings_resources)
+                          common.check_uplinkset_mappings_resources,
+                          mock_oneview)
+
+    def test_load_conf_option_to_dict(self):
+        mappings = common.load_conf_option_to_dict(CONF_UPLINKSET_MAPPINGS)
+
+        self.assertEqual(
+            test_oneview_mech_driver.UPLINKSET_MAPPINGS, mappings)
+        self.assertIs(
+            mappings, common.load_conf_option_to_dict(CONF_UPLINKSET_MAPPINGS))
+        self.assertEqual(
+            test_oneview_mech_driver.FLAT_NET_MAPPINGS,
+            common.load_conf_option_to_dict(CONF_FLAT_NET_MAPPINGS))
+        self.assertEqual({}, common.load_conf_option_to_dict(''))
+
+    def test_id_from_uri(self):
+        self.assertEqual(
+            '12345', common.id_from_uri(common.network_uri_from_id('12345')))
+        self.assertEqual('12345', common.id_from_uri('12345'))
+        self.assertIsNone(common.id_from_uri(None))
+
+    @mock.patch.object(common, 'sessionmaker')
+    @mock.patch.object(common, 'create_engine')
+    def test_get_database_session(self, mock_create_engine, mock_sessionmaker):
+        connection = 'sqlite://'
+        CONF.set_override('connection', connection, group='database')
+        self.addCleanup(common._engines.pop, connection, None)
+
+        common.get_database_session()
+        common.get_database_session()
+
+        mock_create_engine.assert_called_once_with(connection)
+        mock_sessionmaker.assert_called_with(
+            bind=mock_create_engine.return_value, autocommit=True)
+
+    def test_uplinkset_mappings_by_type(self):
+        mock_oneview = mock.MagicMock()
+        mock_oneview.logical_interconnect_groups.get.return_value = (
+            test_oneview_mech_driver.FAKE_LIG)
+
+        uplinkset_by_type = common.uplinkset_mappings_by_type(
+            mock_oneview, test_oneview_mech_driver.UPLINKSET_MAPPINGS)
+
+        self.assertEqual({
+            common.NETWORK_TYPE_TAGGED: {
+                'physnet': ['lig_123', 'uplinkset_vlan']},
+            common.NETWORK_TYPE_UNTAGGED: {
+                'physnet': ['lig_123', 'uplinkset_flat']},
+        }, uplinkset_by_type)
+        mock_oneview.logical_interconnect_groups.get.assert_called_once_with(
+            'lig_123')
+
+    def test_get_boot_priority(self):
+        server_profile = {'connections': [
+            {'boot': {'priority': 'Primary'}},
+            {'boot': {'priority': 'NotBootable'}},
+            {},
+        ]}
+
+        self.assertEqual(
+            'Secondary', common.get_boot_priority(server_profile, True))
+        self.assertEqual(
+            'NotBootable', common.get_boot_priority(server_profile, False))
+
+        server_profile['connections'].append(
+            {'boot': {'priority': 'Secondary'}})
+        self.assertIsNone(common.get_boot_priority(server_profile, True))
+
+    def test_port_id_from_mac(self):
+        server_hardware = copy.deepcopy(
+            test_oneview_mech_driver.FAKE_SERVER_HARDWARE)
+
+        self.assertEqual(
+            "Flb 1:1-a",
+            common.port_id_from_mac(server_hardware, 'AA:11:CC:33:EE:44'))
+
+    def test_port_id_from_mac_not_found(self):
+        server_hardware = copy.deepcopy(
+            test_oneview_mech_driver.FAKE_SERVER_HARDWARE)
+
+        self.assertIsNone(
+            common.port_id_from_mac(server_hardware, 'aa:11:cc:33:ee:55'))
 
     def test_check_server_hardware_availability_locked(self):
         mock_sh = mock.MagicMock()
@@ -0,0 +1,85 @@
+# Copyright 2017 Hewlett Packard Enterprise Development LP.
+# Copyright 2017 Universidade Federal de Campina Grande
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from neutron.db.migration.models import head  # noqa
+from neutron.db.models_v2 import Network
+from neutron.tests import base
+from neutron_lib.db import model_base
+import sqlalchemy as sa
+from sqlalchemy import orm
+
+from networking_oneview.db.oneview_network_db import (
+    OneviewLogicalInterconnectGroup)
+from networking_oneview.db.oneview_network_db import NeutronOneviewNetwork
+from networking_oneview.ml2.drivers.oneview import database_manager
+
+
+class DatabaseManagerTestCase(base.BaseTestCase):
+    def setUp(self):
+        super(DatabaseManagerTestCase, self).setUp()
+        engine = sa.create_engine('sqlite://')
+        model_base.BASEV2.metadata.create_all(engine)
+        self.addCleanup(engine.dispose)
+        self.session = orm.sessionmaker(bind=engine)()
+        self.addCleanup(self.session.close)
+
+        self._add_network('mapped', 'physnet')
+        self._add_network('unmapped', 'physnet')
+        self._add_network('no_physnet', None)
+        self.session.add_all([
+            NeutronOneviewNetwork('mapped', 'ov_mapped'),
+            OneviewLogicalInterconnectGroup(
+                'ov_mapped', 'lig_123', 'uplinkset_flat'),
+            OneviewLogicalInterconnectGroup(
+                'ov_mapped', 'lig_123', 'uplinkset_vlan'),
+        ])
+        self.session.commit()
+        self.session.expunge_all()
+
+        self.statements = []
+        sa.event.listen(
+            engine, 'before_cursor_execute',
+            lambda *args: self.statements.append(args[2]))
+
+    def _add_network(self, network_id, physical_network):
+        self.session.add(Network(id=network_id, name=network_id))
+        self.session.flush()
+        self.session.add(database_manager.NetworkSegment(
+            id=network_id + '_segment', network_id=network_id,
+            network_type='flat', physical_network=physical_network))
+        self.session.flush()
+
+    def test_unmapped_networks_with_segments_query(self):
+        rows = database_manager._unmapped_networks_with_segments_query(
+            self.session).all()
+
+        self.assertEqual(
+            [('unmapped', 'physnet')],
+            [(network.id, segment.physical_network)
+             for network, segment in rows])
+        self.assertEqual(1, len(self.statements))
+
+    def test_mapped_networks_with_segments_and_ligs_query(self):
+        rows = database_manager._mapped_networks_with_segments_and_ligs_query(
+            self.session).all()
+
+        self.assertEqual(
+            [('mapped', 'physnet', 'uplinkset_flat'),
+             ('mapped', 'physnet', 'uplinkset_vlan')],
+            sorted((neutron_oneview_network.neutron_network_id,
+                    segment.physical_network,
+                    lig.oneview_uplinkset_name)
+                   for neutron_oneview_network, segment, lig in rows))
+        self.assertEqual(1, len(self.statements))
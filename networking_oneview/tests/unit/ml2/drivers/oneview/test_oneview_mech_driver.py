@@ -18,6 +18,7 @@ import copy
 import mock
 
 from neutron.tests.unit.plugins.ml2 import _test_mech_agent as base
+from oslo_utils import importutils
 
 from networking_oneview.ml2.drivers.oneview import common
 from networking_oneview.ml2.drivers.oneview import database_manager
@@ -25,6 +26,8 @@ from networking_oneview.ml2.drivers.oneview import exceptions
 from networking_oneview.ml2.drivers.oneview import mech_oneview
 from networking_oneview.ml2.drivers.oneview import neutron_oneview_client
 
+oneview_exceptions = importutils.try_import('hpOneView.exceptions')
+
 FAKE_FLAT_ONEVIEW_NETWORK = {
     'id': '1',
     'provider:physical_network': 'physnet-mapped',
@@ -337,6 +340,34 @@ class OneViewMechanismDriverTestCase(base.AgentMechanismBaseTestCase):
         self.assertFalse(client.ethernet_networks.create.called)
         self.assertFalse(mock_map_net.called)
 
+    def test_resolve_mapping(self):
+        network = self.driver.neutron_oneview_client.network
+
+        self.assertEqual(
+            (common.UPLINKSET_MAPPINGS_TYPE, ['lig_123', 'uplinkset_vlan']),
+            network._resolve_mapping('physnet', 'vlan'))
+        self.assertEqual(
+            (common.UPLINKSET_MAPPINGS_TYPE, ['lig_123', 'uplinkset_flat']),
+            network._resolve_mapping('physnet', 'flat'))
+        self.assertEqual(
+            (common.FLAT_NET_MAPPINGS_TYPE, None),
+            network._resolve_mapping('physnet-mapped', 'flat'))
+        self.assertEqual(
+            (common.MAPPING_TYPE_NONE, None),
+            network._resolve_mapping('physnet', 'vxlan'))
+        self.assertEqual(
+            (common.MAPPING_TYPE_UNMAPPED, None),
+            network._resolve_mapping('not_mapped_phys', 'flat'))
+
+    def test_is_uplinkset_mapping(self):
+        network = self.driver.neutron_oneview_client.network
+
+        self.assertTrue(network.is_uplinkset_mapping('physnet', 'vlan'))
+        self.assertTrue(network.is_uplinkset_mapping('physnet', 'flat'))
+        self.assertTrue(network.is_uplinkset_mapping('physnet-mapped', 'vlan'))
+        self.assertFalse(
+            network.is_uplinkset_mapping('not_mapped_phys', 'flat'))
+
     @mock.patch.object(database_manager, 'get_neutron_oneview_network')
     @mock.patch.object(database_manager, 'delete_neutron_oneview_network')
     @mock.patch.object(database_manager, 'delete_oneview_network_lig')
@@ -401,6 +432,70 @@ class OneViewMechanismDriverTestCase(base.AgentMechanismBaseTestCase):
         self.assertFalse(mock_del_net.called)
         self.assertFalse(mock_del_lig.called)
 
+    def test_add_network_to_uplink_sets(self):
+        client = self.driver.oneview_client
+        uplinksets = [
+            {'uri': '/fake_uplinkset_1', 'networkUris': []},
+            {'uri': '/fake_uplinkset_2', 'networkUris': ['/fake_net_uri']},
+            {'uri': '/fake_uplinkset_3', 'networkUris': []},
+        ]
+
+        self.driver.neutron_oneview_client.network._add_network_to_uplink_sets(
+            uplinksets, '/fake_net_uri')
+
+        self.assertEqual(
+            client.uplink_sets.add_ethernet_networks.call_count, 2)
+        client.uplink_sets.add_ethernet_networks.assert_any_call(
+            '/fake_uplinkset_1', '/fake_net_uri')
+        client.uplink_sets.add_ethernet_networks.assert_any_call(
+            '/fake_uplinkset_3', '/fake_net_uri')
+
+    def test_add_network_to_uplink_sets_fail(self):
+        client = self.driver.oneview_client
+        uplinksets = [
+            {'uri': '/fake_uplinkset_1', 'networkUris': []},
+            {'uri': '/fake_uplinkset_2', 'networkUris': []},
+        ]
+        client.uplink_sets.add_ethernet_networks.side_effect = [
+            None, oneview_exceptions.HPOneViewException("BOOM")]
+
+        self.assertRaises(
+            oneview_exceptions.HPOneViewException,
+            self.driver.neutron_oneview_client.network.
+            _add_network_to_uplink_sets,
+            uplinksets, '/fake_net_uri')
+        self.assertEqual(
+            client.uplink_sets.add_ethernet_networks.call_count, 2)
+
+    @mock.patch.object(neutron_oneview_client.Network, '_add_to_ligs')
+    @mock.patch.object(neutron_oneview_client.Network,
+                       '_remove_network_from_lig_and_lis')
+    @mock.patch.object(database_manager, 'insert_oneview_network_lig')
+    @mock.patch.object(database_manager, 'delete_oneview_network_lig')
+    @mock.patch.object(database_manager, 'get_oneview_network_lig')
+    @mock.patch.object(database_manager, 'list_oneview_network_lig')
+    def test_update_network_lig(
+            self, mock_list_lig, mock_get_lig, mock_del_lig, mock_insert_lig,
+            mock_remove, mock_add):
+        session = 'fake_session'
+        mapped_ligs = [{
+            'oneview_lig_id': 'lig_123',
+            'oneview_uplinkset_name': 'uplinkset_old'
+        }]
+
+        self.driver.neutron_oneview_client.network.update_network_lig(
+            session, '12345', 'vlan', 'physnet', mapped_ligs=mapped_ligs)
+
+        self.assertFalse(mock_list_lig.called)
+        self.assertFalse(mock_get_lig.called)
+        mock_remove.assert_called_once_with(
+            '12345', 'lig_123', 'uplinkset_old', 'tagged')
+        mock_del_lig.assert_called_once_with(
+            session, oneview_network_id='12345', oneview_lig_id='lig_123',
+            oneview_uplinkset_name='uplinkset_old')
+        mock_insert_lig.assert_called_once_with(
+            session, '12345', 'lig_123', 'uplinkset_vlan')
+
     @mock.patch.object(database_manager, 'get_neutron_oneview_network')
     @mock.patch.object(database_manager, 'get_network_segment')
     def test_create_port(self, mock_net_segment, mock_get_net):
@@ -460,6 +555,96 @@ class OneViewMechanismDriverTestCase(base.AgentMechanismBaseTestCase):
                 'connections': self.server_profile['connections']
             })
 
+    @mock.patch.object(database_manager, 'get_neutron_oneview_network')
+    @mock.patch.object(database_manager, 'get_network_segment')
+    def test_create_port_batch_unknown_mac(
+            self, mock_net_segment, mock_get_net):
+        mock_net_segment.return_value = FAKE_NETWORK_SEGMENT
+        mock_get_net.return_value = FakeNetwork()
+        client = self.driver.oneview_client
+        client.server_hardware.get.return_value = self.server_hardware
+        client.server_profiles.get.return_value = self.server_profile
+        old_connections = copy.deepcopy(self.server_profile['connections'])
+        port = copy.deepcopy(FAKE_PORT)
+        port['mac_address'] = 'aa:11:cc:33:ee:66'
+
+        self.driver.neutron_oneview_client.port.create_batch(
+            'fake_session', [port])
+
+        self.assertEqual(old_connections, self.server_profile['connections'])
+        self.assertFalse(client.server_profiles.update.called)
+
+    @mock.patch.object(database_manager, 'get_neutron_oneview_network')
+    @mock.patch.object(database_manager, 'get_network_segment')
+    def test_create_port_batch(self, mock_net_segment, mock_get_net):
+        mock_net_segment.return_value = FAKE_NETWORK_SEGMENT
+        mock_get_net.return_value = FakeNetwork()
+        client = self.driver.oneview_client
+        self.server_hardware['portMap']['deviceSlots'][0]['physicalPorts'][
+            0]['virtualPorts'].append({
+                'mac': 'aa:11:cc:33:ee:55',
+                'portFunction': 'b',
+            })
+        self.server_profile['connections'] = []
+        client.server_hardware.get.return_value = self.server_hardware
+        client.server_profiles.get.return_value = self.server_profile
+        first_port = copy.deepcopy(FAKE_PORT)
+        second_port = copy.deepcopy(FAKE_PORT)
+        second_port['id'] = '2'
+        second_port['mac_address'] = 'aa:11:cc:33:ee:55'
+
+        self.driver.neutron_oneview_client.port.create_batch(
+            'fake_session', [first_port, second_port])
+
+        self.assertEqual(1, mock_get_net.call_count)
+        self.assertEqual(1, client.server_profiles.get.call_count)
+        self.assertEqual(1, client.server_profiles.update.call_count)
+        self.assertEqual(
+            ['Flb 1:1-a', 'Flb 1:1-b'],
+            [c.get('portId') for c in self.server_profile['connections']])
+        self.assertEqual(
+            ['Primary', 'Secondary'],
+            [c.get('boot').get('priority')
+             for c in self.server_profile['connections']])
+
+    @mock.patch.object(database_manager, 'get_neutron_oneview_network')
+    @mock.patch.object(database_manager, 'get_network_segment')
+    def test_create_port_known_network(self, mock_net_segment, mock_get_net):
+        port_context = FakeContext()
+        mock_net_segment.return_value = FAKE_NETWORK_SEGMENT
+        client = self.driver.oneview_client
+        client.server_hardware.get.return_value = self.server_hardware
+        client.server_profiles.get.return_value = self.server_profile
+
+        self.driver.neutron_oneview_client.port.create(
+            port_context._plugin_context._session, port_context._port,
+            neutron_oneview_network=FakeNetwork())
+
+        self.assertFalse(mock_get_net.called)
+        self.assertTrue(client.server_profiles.update.called)
+
+    @mock.patch.object(database_manager, 'get_neutron_oneview_network')
+    @mock.patch.object(database_manager, 'get_network_segment')
+    def test_create_port_existing_conn_up_to_date(
+            self, mock_net_segment, mock_get_net):
+        port_context = FakeContext()
+        mock_net_segment.return_value = FAKE_NETWORK_SEGMENT
+        fake_network_obj = FakeNetwork()
+        mock_get_net.return_value = fake_network_obj
+        client = self.driver.oneview_client
+        client.server_hardware.get.return_value = self.server_hardware
+        client.server_profiles.get.return_value = self.server_profile
+
+        self.server_profile["connections"][0]["portId"] = "Flb 1:1-a"
+        self.server_profile["connections"][0]["networkUri"] = (
+            common.network_uri_from_id(fake_network_obj.oneview_network_id))
+        old_connections = copy.deepcopy(self.server_profile['connections'])
+        self.driver.bind_port(port_context)
+
+        self.assertEqual(old_connections, self.server_profile['connections'])
+        self.assertFalse(client.server_hardware.update_power_state.called)
+        self.assertFalse(client.server_profiles.update.called)
+
     @mock.patch.object(database_manager, 'get_network_segment')
     def test_create_port_net_not_mapped(self, mock_net_segment):
         port_context = FakeContext()
@@ -481,6 +666,7 @@ class OneViewMechanismDriverTestCase(base.AgentMechanismBaseTestCase):
 
         self.driver.bind_port(port_context)
 
+        self.assertFalse(database_manager.get_neutron_oneview_network.called)
         self.assertFalse(client.server_hardware.get.called)
         self.assertFalse(client.server_profiles.get.called)
         self.assertFalse(client.server_profiles.update.called)
@@ -719,3 +905,22 @@ class OneViewMechanismDriverTestCase(base.AgentMechanismBaseTestCase):
         self.assertTrue(client.server_hardware.get.called)
         self.assertFalse(client.server_profiles.get.called)
         self.assertFalse(client.server_profiles.update.called)
+
+    @mock.patch.object(database_manager, 'get_neutron_oneview_network')
+    @mock.patch.object(database_manager, 'get_network_segment')
+    def test_delete_port_postcommit_no_connection(
+            self, mock_net_segment, mock_get_net):
+        port_context = FakeContext()
+        mock_net_segment.return_value = FAKE_NETWORK_SEGMENT
+        fake_network_obj = FakeNetwork()
+        mock_get_net.return_value = fake_network_obj
+        client = self.driver.oneview_client
+        client.server_hardware.get.return_value = self.server_hardware
+        client.server_profiles.get.return_value = self.server_profile
+        self.server_profile['connections'][0]['mac'] = 'aa:11:cc:33:ee:55'
+
+        self.driver.delete_port_postcommit(port_context)
+
+        self.assertTrue(client.server_profiles.get.called)
+        self.assertFalse(client.server_hardware.update_power_state.called)
+        self.assertFalse(client.server_profiles.update.called)
@@ -76,21 +76,21 @@ class SynchronizationTestCase(base.BaseTestCase):
         self.assertTrue(mock_synchronize_uplinkset.called)
         self.assertTrue(mock_recreate_connection.called)
 
-    @mock.patch.object(database_manager, 'get_neutron_oneview_network')
+    @mock.patch.object(database_manager, 'list_neutron_oneview_network')
     @mock.patch.object(database_manager, 'delete_neutron_oneview_network')
     @mock.patch.object(database_manager, 'delete_oneview_network_lig')
     @mock.patch.object(database_manager,
-                       'list_networks_and_segments_with_physnet')
+                       'list_unmapped_networks_with_segments')
     @mock.patch.object(common, 'get_database_session')
     def test_create_oneview_networks_from_neutron(
-            self, mock_session, mock_phys_net, mock_del_lig, mock_del_net,
-            mock_get_net):
+            self, mock_session, mock_unmapped_net, mock_del_lig, mock_del_net,
+            mock_list_net):
         session = mock_session()
         client = self.sync.oneview_client
         client.ethernet_networks.get.return_value = True
-        mock_get_net.return_value = None
+        mock_list_net.return_value = [mech_test.FakeNetwork()]
 
-        mock_phys_net.return_value = [[
+        mock_unmapped_net.return_value = [[
             {'id': '123'},
             {'physical_network': 'physnet',
              'network_type': 'vlan',
@@ -107,32 +107,32 @@ class SynchronizationTestCase(base.BaseTestCase):
 
         self.assertFalse(mock_del_net.called)
         self.assertFalse(mock_del_lig.called)
-        self.sync.neutron_client.network.create.assert_called_with(
+        self.sync.neutron_client.network.create.assert_called_once_with(
             session, network_dict
         )
 
-    @mock.patch.object(database_manager, 'get_neutron_oneview_network')
+    @mock.patch.object(database_manager, 'list_neutron_oneview_network')
     @mock.patch.object(database_manager, 'delete_neutron_oneview_network')
     @mock.patch.object(database_manager, 'delete_oneview_network_lig')
     @mock.patch.object(database_manager,
-                       'list_networks_and_segments_with_physnet')
+                       'list_unmapped_networks_with_segments')
     @mock.patch.object(common, 'get_database_session')
     def test_create_oneview_networks_from_neutron_inconsistent(
-            self, mock_session, mock_phys_net, mock_del_lig, mock_del_net,
-            mock_get_net):
+            self, mock_session, mock_unmapped_net, mock_del_lig, mock_del_net,
+            mock_list_net):
+        session = mock_session()
         client = self.sync.oneview_client
         client.ethernet_networks.get.return_value = None
-        mock_phys_net.return_value = [[
-            {'id': '123'},
-            {'physical_network': 'physnet',
-             'network_type': 'vlan',
-             'segmentation_id': '321'}
-        ]]
+        fake_network = mech_test.FakeNetwork()
+        mock_list_net.return_value = [fake_network]
+        mock_unmapped_net.return_value = []
 
         self.sync.create_oneview_networks_from_neutron()
 
-        self.assertTrue(mock_del_net.called)
-        self.assertTrue(mock_del_lig.called)
+        mock_del_net.assert_called_with(
+            session, neutron_network_id=fake_network.neutron_network_id)
+        mock_del_lig.assert_called_with(
+            session, oneview_network_id=fake_network.oneview_network_id)
 
     @mock.patch.object(database_manager, 'get_neutron_network')
     @mock.patch.object(database_manager, 'get_network_segment')
@@ -197,33 +197,63 @@ class SynchronizationTestCase(base.BaseTestCase):
             session, {'id': '123'}
         )
 
-    @mock.patch.object(database_manager, 'list_neutron_oneview_network')
+    @mock.patch.object(database_manager, 'list_oneview_network_lig')
     @mock.patch.object(database_manager, 'get_network_segment')
+    @mock.patch.object(database_manager,
+                       'list_mapped_networks_with_segments_and_ligs')
     @mock.patch.object(common, 'get_database_session')
     def test_synchronize_uplinkset_from_mapped_networks(
-            self, mock_session, mock_segment, mock_list_net):
+            self, mock_session, mock_list_net, mock_segment, mock_list_lig):
         session = mock_session()
         fake_network = mech_test.FakeNetwork()
-        mock_list_net.return_value = [fake_network]
-        mock_segment.return_value = {
+        network_segment = {
             'network_type': 'flat',
             'physical_network': 'physnet'
         }
+        fake_lig = {
+            'oneview_network_id': fake_network.oneview_network_id,
+            'oneview_lig_id': 'lig_123',
+            'oneview_uplinkset_name': 'uplinkset_flat'
+        }
+        mock_list_net.return_value = [
+            (fake_network, network_segment, fake_lig)
+        ]
 
         self.sync.synchronize_uplinkset_from_mapped_networks()
 
         self.sync.neutron_client.network.update_network_lig.assert_called_with(
-            session, fake_network.oneview_network_id, 'flat', 'physnet'
+            session, fake_network.oneview_network_id, 'flat', 'physnet',
+            mapped_ligs=[fake_lig]
         )
+        self.assertFalse(mock_segment.called)
+        self.assertFalse(mock_list_lig.called)
 
-    @mock.patch.object(database_manager, 'list_neutron_oneview_network')
-    @mock.patch.object(database_manager, 'get_network_segment')
+    @mock.patch.object(database_manager,
+                       'list_mapped_networks_with_segments_and_ligs')
     @mock.patch.object(common, 'get_database_session')
-    def test_synchronize_uplinkset_from_mapped_networks_no_segment(
-            self, mock_session, mock_segment, mock_list_net):
+    def test_synchronize_uplinkset_from_mapped_networks_no_lig(
+            self, mock_session, mock_list_net):
+        session = mock_session()
         fake_network = mech_test.FakeNetwork()
-        mock_list_net.return_value = [fake_network]
-        mock_segment.return_value = None
+        network_segment = {
+            'network_type': 'flat',
+            'physical_network': 'physnet'
+        }
+        mock_list_net.return_value = [(fake_network, network_segment, None)]
+
+        self.sync.synchronize_uplinkset_from_mapped_networks()
+
+        self.sync.neutron_client.network.update_network_lig.assert_called_with(
+            session, fake_network.oneview_network_id, 'flat', 'physnet',
+            mapped_ligs=[]
+        )
+
+    @mock.patch.object(database_manager,
+                       'list_mapped_networks_with_segments_and_ligs')
+    @mock.patch.object(common, 'get_database_session')
+    def test_synchronize_uplinkset_from_mapped_networks_no_segment(
+            self, mock_session, mock_list_net):
+        mock_list_net.return_value = []
 
         self.sync.synchronize_uplinkset_from_mapped_networks()
 
@@ -231,6 +261,7 @@ class SynchronizationTestCase(base.BaseTestCase):
             self.sync.neutron_client.network.update_network_lig.called
         )
 
+    @mock.patch.object(common, 'server_profile_from_server_hardware')
     @mock.patch.object(database_manager, 'get_port_with_binding_profile')
     @mock.patch.object(database_manager, 'list_neutron_oneview_network')
     @mock.patch.object(
@@ -241,8 +272,8 @@ class SynchronizationTestCase(base.BaseTestCase):
     @mock.patch.object(common, 'get_database_session')
     def test_recreate_connection(
             self, mock_session, mock_fix_sp, mock_update,
-            mock_lli, mock_sh, mock_list_net, mock_port):
-        client = self.sync.neutron_client
+            mock_lli, mock_sh, mock_list_net, mock_port,
+            mock_sp):
         mock_port.return_value = [[
             {'network_id': '123',
              'mac_address': 'aa:11:cc:33:ee:44'},
@@ -255,16 +286,15 @@ class SynchronizationTestCase(base.BaseTestCase):
         server_profile['connections'][0]['networkUri'] = (
             '/rest/ethernet-networks/' + fake_network.oneview_network_id
         )
-        client.port.server_profile_from_server_hardware.return_value = (
-            server_profile
-        )
+        mock_sp.return_value = server_profile
 
         self.sync.recreate_connection()
 
-        mock_fix_sp.assert_called_with(server_profile)
+        mock_fix_sp.assert_called_with(server_profile, mock_sh.return_value)
         self.assertFalse(mock_update.called)
-        self.assertFalse(self.sync.neutron_client.port.create.called)
+        self.assertFalse(self.sync.neutron_client.port.create_batch.called)
 
+    @mock.patch.object(common, 'server_profile_from_server_hardware')
     @mock.patch.object(database_manager, 'get_port_with_binding_profile')
     @mock.patch.object(database_manager, 'list_neutron_oneview_network')
     @mock.patch.object(
@@ -275,8 +305,8 @@ class SynchronizationTestCase(base.BaseTestCase):
     @mock.patch.object(common, 'get_database_session')
     def test_recreate_connection_different_network(
             self, mock_session, mock_fix_sp, mock_update,
-            mock_lli, mock_sh, mock_list_net, mock_port):
-        client = self.sync.neutron_client
+            mock_lli, mock_sh, mock_list_net, mock_port,
+            mock_sp):
         mock_port.return_value = [[
             {'network_id': '123',
              'mac_address': 'aa:11:cc:33:ee:44'},
@@ -286,19 +316,18 @@ class SynchronizationTestCase(base.BaseTestCase):
         fake_network = mech_test.FakeNetwork()
         mock_list_net.return_value = [fake_network]
         server_profile = copy.deepcopy(mech_test.FAKE_SERVER_PROFILE)
-        client.port.server_profile_from_server_hardware.return_value = (
-            server_profile
-        )
+        mock_sp.return_value = server_profile
 
         self.sync.recreate_connection()
 
-        mock_fix_sp.assert_called_with(server_profile)
+        mock_fix_sp.assert_called_with(server_profile, mock_sh.return_value)
         mock_update.assert_called_with(
             '/rest/ethernet-networks/' + fake_network.oneview_network_id,
             server_profile,
-            server_profile.get('connections')[0]
+            server_profile.get('connections')[0],
+            mock_sh.return_value
         )
-        self.assertFalse(self.sync.neutron_client.port.create.called)
+        self.assertFalse(self.sync.neutron_client.port.create_batch.called)
 
     @mock.patch.object(database_manager, 'get_port_with_binding_profile')
     @mock.patch.object(database_manager, 'list_neutron_oneview_network')
@@ -331,6 +360,89 @@ class SynchronizationTestCase(base.BaseTestCase):
 
         self.assertFalse(mock_fix_sp.called)
         self.assertFalse(mock_update.called)
-        self.sync.neutron_client.port.create.assert_called_with(
-            session, port_dict
+        self.sync.neutron_client.port.create_batch.assert_called_with(
+            session, [port_dict], {}
         )
+
+    @mock.patch.object(database_manager, 'get_port_with_binding_profile')
+    @mock.patch.object(database_manager, 'list_neutron_oneview_network')
+    @mock.patch.object(
+        common, 'server_hardware_from_local_link_information_list')
+    @mock.patch.object(common, 'local_link_information_from_port')
+    @mock.patch.object(sync, '_update_connection')
+    @mock.patch.object(sync, '_fix_connections_with_removed_networks')
+    @mock.patch.object(common, 'get_database_session')
+    def test_recreate_connection_same_server_hardware(
+            self, mock_session, mock_fix_sp, mock_update,
+            mock_lli, mock_sh, mock_list_net, mock_port):
+        mock_lli.return_value = copy.deepcopy(
+            mech_test.FAKE_PORT['binding:profile']['local_link_information'])
+        mock_port.return_value = [[
+            {'network_id': '123',
+             'mac_address': 'aa:11:cc:33:ee:44'},
+            {'vnic_type': 'baremetal',
+             'profile': '1111'}
+        ], [
+            {'network_id': '123',
+             'mac_address': 'aa:11:cc:33:ee:55'},
+            {'vnic_type': 'baremetal',
+             'profile': '1111'}
+        ]]
+        mock_list_net.return_value = []
+
+        self.sync.recreate_connection()
+
+        self.assertEqual(mock_sh.call_count, 1)
+        port_dicts = (
+            self.sync.neutron_client.port.create_batch.call_args[0][1])
+        self.assertEqual(len(port_dicts), 2)
+
+    @mock.patch.object(common, 'get_server_hardware_power_state')
+    @mock.patch.object(common, 'check_oneview_entities_availability')
+    def test_update_connection_refreshes_server_hardware(
+            self, mock_availability, mock_power_state):
+        stale_server_hardware = copy.deepcopy(mech_test.FAKE_SERVER_HARDWARE)
+        stale_server_hardware['powerLock'] = True
+        server_hardware = copy.deepcopy(mech_test.FAKE_SERVER_HARDWARE)
+        self.sync.oneview_client.server_hardware.get.return_value = (
+            server_hardware)
+        server_profile = copy.deepcopy(mech_test.FAKE_SERVER_PROFILE)
+
+        self.sync._update_connection(
+            '/rest/ethernet-networks/12345', server_profile,
+            server_profile['connections'][0], stale_server_hardware)
+
+        self.sync.oneview_client.server_hardware.get.assert_called_once_with(
+            server_hardware.get('uuid'))
+        mock_availability.assert_called_once_with(
+            self.sync.oneview_client, server_hardware)
+        mock_power_state.assert_called_once_with(server_hardware)
+
+    @mock.patch.object(common, 'server_profile_from_server_hardware')
+    @mock.patch.object(database_manager, 'get_port_with_binding_profile')
+    @mock.patch.object(database_manager, 'list_neutron_oneview_network')
+    @mock.patch.object(
+        common, 'server_hardware_from_local_link_information_list')
+    @mock.patch.object(common, 'local_link_information_from_port')
+    @mock.patch.object(sync, '_update_connection')
+    @mock.patch.object(sync, '_fix_connections_with_removed_networks')
+    @mock.patch.object(common, 'get_database_session')
+    def test_recreate_connection_no_connection(
+            self, mock_session, mock_fix_sp, mock_update,
+            mock_lli, mock_sh, mock_list_net, mock_port, mock_sp):
+        session = mock_session()
+        mock_port.return_value = [[
+            {'network_id': '123',
+             'mac_address': 'aa:11:cc:33:ee:55'},
+            {'vnic_type': 'baremetal',
+             'profile': '1111'}
+        ]]
+        fake_network = mech_test.FakeNetwork()
+        mock_list_net.return_value = [fake_network]
+        mock_sp.return_value = copy.deepcopy(mech_test.FAKE_SERVER_PROFILE)
+
+        self.sync.recreate_connection()
+
+        self.assertFalse(mock_update.called)
+        self.sync.neutron_client.port.create_batch.assert_called_once_with(
+            session, [mock.ANY], {'123': fake_network})